@@ -1,9 +1,39 @@
 import os
-import re
+import sys
 import math
+import pickle
+import hashlib
+import heapq
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import nltk
 from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+
+# RE2 matches in linear time whatever the pattern; use it when installed
+try:
+    import re2 as _re
+except ImportError:
+    import re as _re
+
+
+# Every character str.split() treats as whitespace, listed out because
+# RE2's \s only covers ASCII spaces; both engines then strip the same text
+_WHITESPACE = ('\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000-\u200a'
+               '\u2028\u2029\u202f\u205f\u3000')
+_PUNCT_RE = _re.compile(f'[^a-zA-Z0-9{_WHITESPACE}]')
+_STOPWORDS = frozenset(word.lower() for word in stopwords.words('english'))
+
+# Folders with fewer documents than this are preprocessed in-process
+PARALLEL_MIN_DOCUMENTS = 32
+
+# Built search engines are pickled here, next to this file rather than in
+# the working directory, so only files this module wrote are ever pruned.
+# Bump the version whenever what gets indexed or how it is stored changes,
+# so old pickles are ignored.
+INDEX_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '.search_engine_cache')
+INDEX_CACHE_VERSION = 3
 
 
 class NounExtractor:
@@ -27,6 +57,10 @@ class NounExtractor:
             "perseverance", "sincerity", "thoughtfulness", "unity", "wisdom"
         }
 
+        # Every noun type above is handled the same way, so one lookup covers them all
+        self.known_nouns = frozenset(
+            self.collective_nouns | self.material_nouns | self.abstract_nouns)
+
         self.possessive_suffix = "'s"
         self.determiners = {"a", "an", "the"}
 
@@ -37,17 +71,16 @@ class NounExtractor:
         # Simple POS tagging simulation
         for i, word in enumerate(words):
             word = word.strip(",.!?")
+            # Tokens made up only of punctuation are empty once stripped
+            if not word:
+                continue
 
             # Proper nouns: Start with a capital letter and are not the first word after a determiner
             if word[0].isupper() and (i == 0 or words[i-1].lower() not in self.determiners):
                 nouns.add(word)
 
-            # Collective nouns
-            elif word.lower() in self.collective_nouns:
-                nouns.add(word)
-
-            # Material nouns
-            elif word.lower() in self.material_nouns:
+            # Collective, material and abstract nouns
+            elif word.lower() in self.known_nouns:
                 nouns.add(word)
 
             # Possessive nouns
@@ -58,119 +91,38 @@ class NounExtractor:
             elif "-" in word:
                 nouns.add(word)
 
-            # Abstract nouns (hard-coded example; extendable for specific concepts)
-            elif word.lower() in self.abstract_nouns:
-                nouns.add(word)
-
         return nouns
 
 
-class HashTable:
-    def __init__(self, initial_size=16):
-        """Initialize the hash table with a specific initial size."""
-        self.table = [None] * initial_size  # Create a list of empty buckets
-        self.size = initial_size
-        self.count = 0
-
-    def _hash(self, key):
-        """Generate a hash code for the given key."""
-        hash_value = 0
-        for char in key:
-            hash_value = (hash_value * 31 + ord(char)) % self.size
-        return hash_value
-
-    def _resize(self):
-        """Resize the hash table when it's too full."""
-        self.size *= 2
-        new_table = [None] * self.size
-        for bucket in self.table:
-            if bucket:
-                for key, value in bucket:
-                    new_index = self._hash(key)
-                    if new_table[new_index] is None:
-                        new_table[new_index] = [(key, value)]
-                    else:
-                        new_table[new_index].append((key, value))
-        self.table = new_table
-
-    def insert(self, key, value):
-        """Insert a key-value pair into the hash table."""
-        index = self._hash(key)
-        if self.table[index] is None:
-            self.table[index] = [(key, value)]
-        else:
-            # Handle collision using chaining (linked list)
-            for i, (existing_key, existing_value) in enumerate(self.table[index]):
-                if existing_key == key:
-                    # If the word already exists, update the word count for the doc_id
-                    found = False
-                    for doc in existing_value:
-                        if doc['doc_id'] == value[0]['doc_id']:
-                            # Increment word count for this doc
-                            doc['count'] += 1
-                            found = True
-                            break
-                    if not found:
-                        # Append new doc_id if not found
-                        self.table[index][i][1].append(value[0])
-                    return
-            self.table[index].append((key, value))  # Insert new key-value pair
-
-        self.count += 1
-        if self.count > self.size * 0.7:  # Load factor threshold for resizing
-            self._resize()
-
-    def lookup(self, key):
-        """Lookup the value associated with the given key."""
-        index = self._hash(key)
-        if self.table[index]:
-            for stored_key, stored_value in self.table[index]:
-                if stored_key == key:
-                    return stored_value  # Return all associated document details
-        return None  # Return None if the key is not found
-
-    def remove(self, key):
-        """Remove a key-value pair from the hash table."""
-        index = self._hash(key)
-        if self.table[index]:
-            for i, (stored_key, stored_value) in enumerate(self.table[index]):
-                if stored_key == key:
-                    del self.table[index][i]
-                    self.count -= 1
-                    return True
-        return False  # Return False if the key was not found
-
-    def __str__(self):
-        """String representation for debugging."""
-        return str(self.table)
+# The noun sets never change, so one extractor is shared by every document
+_NOUN_EXTRACTOR = NounExtractor()
 
 
 class Indexer:
     def __init__(self):
-        self.index = HashTable()
+        # Maps each word to its postings: doc_id -> count of the word in that doc
+        self.index = defaultdict(Counter)
 
     def add_document(self, doc_id, words):
         """Add a document to the index."""
-        for word in words:
-            self.index.insert(
-                word.lower(), [{'doc_id': doc_id, 'count': 1}])
+        # Count the document's words first so each distinct word is updated once
+        word_counts = Counter(word.lower() for word in words)
+        for word, count in word_counts.items():
+            self.index[word][doc_id] += count
 
     def search(self, query_words):
-        """Search for documents by keyword."""
-        results = []
-        for word in query_words:
-            search_result = self.index.lookup(word.lower())
+        """Search for documents by keyword, yielding (word, doc_id, count) hits."""
+        # Look each distinct word up once; repeats would only duplicate hits
+        for word in dict.fromkeys(word.lower() for word in query_words):
+            search_result = self.index.get(word)
             if search_result:
-                # Flatten the list of results and get only the doc_id's
-                for item in search_result:
-                    # Each item is now a dict with doc_id and count
-                    results.append(
-                        f"Query Word: {word}, Doc ID: {item['doc_id']}, (Count: {item['count']})")
-        return results
+                # Postings map each doc_id to the word's count in that doc
+                for doc_id, count in search_result.items():
+                    yield word, doc_id, count
 
     def lookup(self, word):
         """Lookup a word in the index."""
-        return self.index.lookup(word)
+        return self.index.get(word)
 
 
 class SearchEngine:
@@ -186,6 +138,11 @@ class SearchEngine:
         preprocessed_title = self.preprocessing(title, is_query=False)
         preprocessed_content = self.preprocessing(content, is_query=False)
 
+        self.add_preprocessed_document(
+            title, content, preprocessed_title, preprocessed_content)
+
+    def add_preprocessed_document(self, title, content, preprocessed_title, preprocessed_content):
+        """Index a document whose title and content were already preprocessed."""
         self.indexer_title.add_document(self.no_of_docs, preprocessed_title)
         self.indexer_content.add_document(
             self.no_of_docs, preprocessed_content)
@@ -195,67 +152,53 @@ class SearchEngine:
 
         self.no_of_docs += 1
 
-    def preprocessing(self, text, is_query=False):
+    @staticmethod
+    def preprocessing(text, is_query=False):
         """Process text: remove punctuation, convert to lowercase, and lemmatize words."""
-        text = re.sub(r'[^a-zA-Z0-9\s]', '', text).strip()
-
-        stop_words = set(stopwords.words('english'))
-        word_tokens = word_tokenize(text)
+        # With punctuation gone the text is only words and whitespace, so a
+        # plain split tokenizes it without a separate tokenizer pass
+        word_tokens = _PUNCT_RE.sub('', text).split()
 
         if not is_query:
-            extractor = NounExtractor()
-            word_tokens = extractor.extract_nouns(word_tokens)
+            word_tokens = _NOUN_EXTRACTOR.extract_nouns(word_tokens)
 
-        return [word for word in word_tokens if word.lower() not in stop_words]
+        return [word for word in word_tokens if word.lower() not in _STOPWORDS]
 
     def search_by_title(self, query):
         """Search by title using index."""
-        words = self.preprocessing(query, is_query=True)
+        words = preprocess_query(query)
         results = self.indexer_title.search(words)
 
-        format_string = ""
-        for item in results:
-
-            item = item.split(',')
-            doc_id = int(item[1].split(':')[1].strip())
-            count = item[2].split(':')[1].strip()
-            count = int(count[:-1])
-            query_word = item[0].split(':')[1].strip()
-            title = self.documents[doc_id].get('title')
-            content = self.documents[doc_id].get('content')
-
-            format_string += f"Document ID: {doc_id}, Title: {title}\n{content}\n\n"
-        return format_string
+        return self._format_hits(results)
 
     def search_by_content(self, query):
-        """Search by title using index."""
-        words = self.preprocessing(query, is_query=True)
+        """Search by content using index."""
+        words = preprocess_query(query)
         results = self.indexer_content.search(words)
 
-        format_string = ""
-        for item in results:
+        return self._format_hits(results)
 
-            item = item.split(',')
-            doc_id = int(item[1].split(':')[1].strip())
-            count = item[2].split(':')[1].strip()
-            count = int(count[:-1])
-            query_word = item[0].split(':')[1].strip()
-            title = self.documents[doc_id].get('title')
-            content = self.documents[doc_id].get('content')
-
-            format_string += f"Document ID: {doc_id}, Title: {title}\n{content}\n\n"
-        return format_string
+    def _format_hits(self, results):
+        """Format (word, doc_id, count) search hits as document listings."""
+        parts = []
+        for _, doc_id, _ in results:
+            doc = self.documents[doc_id]
+            parts.append(
+                f"Document ID: {doc_id}, Title: {doc['title']}\n{doc['content']}\n\n")
+        return "".join(parts)
 
-    def search_by_tf_idf(self, query):
-        """Ranked search based on TF-IDF scores."""
-        words = self.preprocessing(query, is_query=True)
+    def search_by_tf_idf(self, query, top_k=None):
+        """Ranked search based on TF-IDF scores, optionally keeping only the top_k documents."""
+        words = preprocess_query(query)
 
-        # Initialize a dictionary to store the TF-IDF scores for each document
-        scores = {doc_id: 0 for doc_id in self.documents}
+        # Only documents that contain a query word ever get a score
+        scores = defaultdict(float)
+        doc_lengths = self.doc_lengths
 
-        for word in words:
+        # Each distinct word counts once, however often it was typed
+        for word in dict.fromkeys(word.lower() for word in words):
             # Get the document list for the word from the content index
-            word_docs = self.indexer_content.lookup(word.lower())
+            word_docs = self.indexer_content.lookup(word)
 
             if not word_docs:
                 continue
@@ -266,46 +209,144 @@ class SearchEngine:
             # Add 1 to avoid division by zero
             idf = math.log(self.no_of_docs / (docs_containing_word + 1))
 
-            for item in word_docs:
-                doc_id = item['doc_id']
-                count = item['count']
+            for doc_id, count in word_docs.items():
+                # TF of the word in the document, times the word's IDF
+                scores[doc_id] += count / doc_lengths[doc_id] * idf
 
-                # Calculate TF for the word in the document
-                doc_length = self.doc_lengths[doc_id]
-                tf = count / doc_length
+        # Rank the documents by their TF-IDF scores (highest to lowest),
+        # breaking ties by document ID
+        def ranking_key(item):
+            return item[1], -item[0]
 
-                # Update the TF-IDF score for the document
-                scores[doc_id] += tf * idf
-
-        # Rank the documents by their TF-IDF scores (highest to lowest)
-        ranked_results = sorted(
-            scores.items(), key=lambda x: x[1], reverse=True)
+        if top_k is None:
+            ranked_results = sorted(
+                scores.items(), key=ranking_key, reverse=True)
+        else:
+            ranked_results = heapq.nlargest(
+                top_k, scores.items(), key=ranking_key)
 
         format_string = self.get_ranked_results_format_string(ranked_results)
         return format_string
 
     def get_ranked_results_format_string(self, ranked_results):
-
-        format_string = ""
         """Display ranked search results with TF-IDF scores."""
+        parts = []
         for doc_id, score in ranked_results:
             if score == 0:
                 continue
             doc = self.documents[doc_id]
 
-            format_string += f"\nDocument ID {doc_id} (Score: {score:.4f}): {doc['title']}\n{doc['content']}\n\n"
-        return format_string
+            parts.append(
+                f"\nDocument ID {doc_id} (Score: {score:.4f}): {doc['title']}\n{doc['content']}\n\n")
+        return "".join(parts)
+
+
+@lru_cache(maxsize=1024)
+def preprocess_query(query):
+    """Preprocess a search query; repeated queries come from the cache."""
+    return tuple(SearchEngine.preprocessing(query, is_query=True))
+
+
+def preprocess_file(path):
+    """Read and preprocess one document; runs in a worker process."""
+    with open(path, 'r') as file:
+        content = file.read()
+    title = os.path.basename(path).replace('.txt', '')
+    return (title, content,
+            SearchEngine.preprocessing(title, is_query=False),
+            SearchEngine.preprocessing(content, is_query=False))
+
+
+def index_cache_path(paths):
+    """Cache file for an index built from these documents as they are now."""
+    # Pickles from another interpreter version are never worth trying
+    key = hashlib.sha1(
+        f"v{INDEX_CACHE_VERSION}:{sys.version_info[:2]}\n".encode())
+    for path in paths:
+        stat = os.stat(path)
+        key.update(
+            f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return os.path.join(INDEX_CACHE_DIR, f"index-{key.hexdigest()}.pkl")
+
+
+def save_index_cache(search_engine, cache_path):
+    """Pickle a built search engine; failing to cache it is never fatal."""
+    # Write to a temporary file first so a crash never leaves a partial cache
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(INDEX_CACHE_DIR, exist_ok=True)
+        with open(temp_path, 'wb') as file:
+            pickle.dump(search_engine, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except (OSError, pickle.PicklingError):
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def is_index_cache_name(name):
+    """Whether a file name is one index_cache_path could have produced."""
+    digest = name[len('index-'):-len('.pkl')]
+    return (name.startswith('index-') and name.endswith('.pkl')
+            and len(digest) == 40 and all(c in '0123456789abcdef' for c in digest))
+
+
+def remove_stale_index_caches(current_path):
+    """Delete every cached index except the one just written."""
+    current_name = os.path.basename(current_path)
+    try:
+        with os.scandir(INDEX_CACHE_DIR) as entries:
+            stale_paths = [entry.path for entry in entries
+                           if is_index_cache_name(entry.name)
+                           and entry.name != current_name]
+    except OSError:
+        return
+    for path in stale_paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
 
 def load_documents(folder_path):
     """Load text documents from a folder into the search engine."""
+    # Sorted so document IDs don't depend on the directory's listing order
+    with os.scandir(folder_path) as entries:
+        paths = sorted(entry.path for entry in entries
+                       if entry.name.endswith('.txt') and entry.is_file())
+
+    # Reuse the index from an earlier run if none of the documents changed
+    cache_path = index_cache_path(paths)
+    try:
+        with open(cache_path, 'rb') as file:
+            cached = pickle.load(file)
+    except Exception:
+        # Unreadable, truncated or corrupt caches raise all sorts of errors,
+        # and pickles made with the module run as a script reference
+        # __main__, so loading one from an import (or the reverse) can fail
+        # to resolve; any of these just means rebuilding the index
+        cached = None
+    if isinstance(cached, SearchEngine):
+        return cached
+
     search_engine = SearchEngine()
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.txt'):
-            with open(os.path.join(folder_path, filename), 'r') as file:
-                title = filename.replace('.txt', '')
-                content = file.read()
-                search_engine.add_document(title, content)
+
+    # Preprocessing is independent per document, so spread it over worker
+    # processes; only the index updates below need to happen in order here.
+    # Small folders are done in-process since starting workers costs more.
+    if len(paths) < PARALLEL_MIN_DOCUMENTS:
+        for document in map(preprocess_file, paths):
+            search_engine.add_preprocessed_document(*document)
+    else:
+        with ProcessPoolExecutor() as executor:
+            for document in executor.map(preprocess_file, paths, chunksize=8):
+                search_engine.add_preprocessed_document(*document)
+
+    if save_index_cache(search_engine, cache_path):
+        remove_stale_index_caches(cache_path)
     return search_engine
 
 
@@ -1,137 +1,173 @@
 import os
 import math
-import re
+import string
+import sys
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _AlphaTable(dict):
+    # str.translate table that deletes everything except a-z and whitespace;
+    # entries are filled in lazily so non-ASCII input is handled as well
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        keep = char in string.ascii_lowercase or char.isspace()
+        self[codepoint] = codepoint if keep else None
+        return self[codepoint]
+
+
+_ALPHA_TABLE = _AlphaTable()
 
 # Step 1: Gather Your Documents
 
 
+def read_document(path):
+    with open(path, 'r') as file:
+        return file.read()
+
+
 def load_documents(folder_path):
-    documents = {}
-    for filename in os.listdir(folder_path):
-        if filename.endswith('.txt'):
-            with open(os.path.join(folder_path, filename), 'r') as file:
-                documents[filename] = file.read()
-    return documents
+    with os.scandir(folder_path) as entries:
+        paths = sorted(entry.path for entry in entries
+                       if entry.name.endswith('.txt') and entry.is_file())
+    # Reading a file releases the GIL, so the reads can overlap in threads
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        contents = executor.map(read_document, paths)
+        return {os.path.basename(path): content
+                for path, content in zip(paths, contents)}
+
+# Step 2: Index the Documents
+
+
+class DocumentRanker:
+    def __init__(self, documents):
+        self.documents = documents
+        # Everything below depends only on the corpus, so it is computed once
+        # here instead of again on every query
+        # TF, IDF and cosine all use the same preprocessed terms as the query
+        self.doc_counters = {doc_name: Counter(preprocess_text(doc_content).split())
+                             for doc_name, doc_content in documents.items()}
+        self.doc_tfs = {doc_name: compute_tf(counter)
+                        for doc_name, counter in self.doc_counters.items()}
+        self.idf = compute_idf(self.doc_tfs)
+        self.doc_norms = {doc_name: vector_norm(counter)
+                          for doc_name, counter in self.doc_counters.items()}
+        # Inverted views of the two tables above (term -> {doc_name: value}),
+        # so a query only visits the documents that contain its terms
+        self.term_tfs = invert(self.doc_tfs)
+        self.term_counts = invert(self.doc_counters)
+
+    # Step 3: Query Function
+
+    def query_documents(self, query, method='keyword_matching'):
+        query = preprocess_text(query)
+        if method == 'keyword_matching':
+            return self.keyword_matching(query)
+        elif method == 'tf_idf':
+            return self.tf_idf_ranking(query)
+        elif method == 'cosine_similarity':
+            return self.cosine_similarity_ranking(query)
+        else:
+            raise ValueError("Unknown method specified")
 
-# Step 3: Query Function
+    # Step 4: Keyword Matching
 
+    def keyword_matching(self, query):
+        scores = dict.fromkeys(self.documents, 0)
+        for keyword in set(query.split()):
+            for doc_name in self.term_counts.get(keyword, ()):
+                scores[doc_name] += 1
+        return rank(scores)
 
-def query_documents(query, documents, method='keyword_matching'):
-    query = preprocess_text(query)
-    if method == 'keyword_matching':
-        return keyword_matching(query, documents)
-    elif method == 'tf_idf':
-        return tf_idf_ranking(query, documents)
-    elif method == 'cosine_similarity':
-        return cosine_similarity_ranking(query, documents)
-    else:
-        raise ValueError("Unknown method specified")
+    # Step 5: TF-IDF Scoring
 
-# Step 4: Keyword Matching
+    def tf_idf_ranking(self, query):
+        # A repeated query term is only scored once
+        query_terms = dict.fromkeys(preprocess_text(query).split())
+        tfidf_scores = dict.fromkeys(self.documents, 0)
+        for term in query_terms:
+            term_idf = self.idf.get(term, 0)
+            for doc_name, tf in self.term_tfs.get(term, {}).items():
+                tfidf_scores[doc_name] += tf * term_idf
+        return rank(tfidf_scores)
+
+    # Step 6: Cosine Similarity
+
+    def cosine_similarity_ranking(self, query):
+        # Repeated query terms don't add weight, so every term counts as 1
+        query_counter = dict.fromkeys(preprocess_text(query).split(), 1)
+        # Terms in no document are outside the vocabulary and don't count
+        query_norm = vector_norm({term: count for term, count in query_counter.items()
+                                  if term in self.term_counts})
+        # Only terms that appear in the query contribute to the dot product
+        dot_products = dict.fromkeys(self.documents, 0)
+        for term, count in query_counter.items():
+            for doc_name, doc_count in self.term_counts.get(term, {}).items():
+                dot_products[doc_name] += count * doc_count
+        cosine_scores = {}
+        for doc_name, dot_product in dot_products.items():
+            doc_norm = self.doc_norms[doc_name]
+            if query_norm == 0 or doc_norm == 0:
+                cosine_scores[doc_name] = 0
+            else:
+                cosine_scores[doc_name] = dot_product / (query_norm * doc_norm)
+        return rank(cosine_scores)
 
 
 def preprocess_text(text):
     # Convert text to lowercase and remove non-alphabetical characters
-    text = text.lower()
-    return re.sub(r'[^a-z\s]', '', text)
-
+    return text.lower().translate(_ALPHA_TABLE)
 
-def keyword_matching(query, documents):
-    query_keywords = query.split()
-    scores = {}
-    for doc_name, doc_content in documents.items():
-        doc_keywords = preprocess_text(doc_content).split()
-        matched_keywords = set(query_keywords).intersection(set(doc_keywords))
-        scores[doc_name] = len(matched_keywords)
-    ranked_docs = sorted(
-        scores.items(), key=lambda item: item[1], reverse=True)
-    return ranked_docs
 
-# Step 5: TF-IDF Scoring
+def rank(scores):
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
 
 
-def compute_tf(doc):
-    tf = Counter(doc.split())
-    total_terms = len(doc.split())
-    for term in tf:
-        tf[term] = tf[term] / total_terms
-    return tf
+def compute_tf(term_counts):
+    total_terms = sum(term_counts.values())
+    return {term: count / total_terms for term, count in term_counts.items()}
 
 
-def compute_idf(documents):
+def compute_idf(doc_tfs):
+    # doc_tfs holds each document's term frequencies, so its keys are
+    # already the document's distinct terms
     idf = {}
-    total_docs = len(documents)
-    for doc in documents.values():
-        terms_in_doc = set(doc.split())
-        for term in terms_in_doc:
+    total_docs = len(doc_tfs)
+    for doc_tf in doc_tfs.values():
+        for term in doc_tf:
             idf[term] = idf.get(term, 0) + 1
     for term in idf:
-        idf[term] = math.log(total_docs / 1 + idf[term])
+        # Smoothed IDF: log((N + 1) / (df + 1)) + 1
+        idf[term] = math.log((total_docs + 1) / (idf[term] + 1)) + 1
     return idf
 
 
-def tf_idf_ranking(query, documents):
-    query_terms = preprocess_text(query).split()
-    tfidf_scores = {}
-    tf = compute_tf(' '.join(query_terms))
-    idf = compute_idf(documents)
+def invert(doc_vectors):
+    term_vectors = {}
+    for doc_name, vector in doc_vectors.items():
+        for term, value in vector.items():
+            term_vectors.setdefault(term, {})[doc_name] = value
+    return term_vectors
 
-    for doc_name, doc_content in documents.items():
-        doc_tf = compute_tf(doc_content)
-        score = 0
-        for term in query_terms:
-            if term in doc_tf:
-                # score += doc_tf[term] * idf.get(term, 0) * tf.get(term, 0)
-                score += doc_tf[term] * idf.get(term, 0)
-        tfidf_scores[doc_name] = score
-    ranked_docs = sorted(tfidf_scores.items(),
-                         key=lambda item: item[1], reverse=True)
-    return ranked_docs
-
-# Step 6: Cosine Similarity
-
-
-def cosine_similarity_ranking(query, documents):
-    query_vector = build_vector(preprocess_text(query), documents)
-    cosine_scores = {}
-    for doc_name, doc_content in documents.items():
-        doc_vector = build_vector(preprocess_text(doc_content), documents)
-        cosine_scores[doc_name] = cosine_similarity(query_vector, doc_vector)
-    ranked_docs = sorted(cosine_scores.items(),
-                         key=lambda item: item[1], reverse=True)
-    return ranked_docs
-
-
-def build_vector(query, documents):
-    vector = Counter(query.split())
-    all_terms = set()
-    for doc_content in documents.values():
-        all_terms.update(doc_content.split())
-    return {term: vector.get(term, 0) for term in all_terms}
-
-
-def cosine_similarity(vec1, vec2):
-    dot_product = sum(vec1.get(term, 0) * vec2.get(term, 0) for term in vec1)
-    magnitude1 = math.sqrt(sum(val**2 for val in vec1.values()))
-    magnitude2 = math.sqrt(sum(val**2 for val in vec2.values()))
-    if magnitude1 == 0 or magnitude2 == 0:
-        return 0
-    return dot_product / (magnitude1 * magnitude2)
+
+def vector_norm(vector):
+    return math.sqrt(sum(val**2 for val in vector.values()))
 
 # Step 7: Display Results
 
 
 def display_ranked_documents(ranked_docs):
-    for doc_name, score in ranked_docs:
-        print(f"{doc_name} - Relevance Score: {score}")
+    # Write all results at once rather than one print call per document
+    lines = [f"{doc_name} - Relevance Score: {score}\n"
+             for doc_name, score in ranked_docs]
+    sys.stdout.write(''.join(lines))
 
 # Step 8: User Interaction
 
 
 def main():
     folder_path = "documents"
-    documents = load_documents(folder_path)
+    ranker = DocumentRanker(load_documents(folder_path))
 
     while True:
         print("\nSelect ranking method:")
@@ -147,13 +183,13 @@ def main():
         query = input("Enter your query: ").strip()
 
         if choice == '1':
-            ranked_docs = query_documents(
-                query, documents, method='keyword_matching')
+            ranked_docs = ranker.query_documents(
+                query, method='keyword_matching')
         elif choice == '2':
-            ranked_docs = query_documents(query, documents, method='tf_idf')
+            ranked_docs = ranker.query_documents(query, method='tf_idf')
         elif choice == '3':
-            ranked_docs = query_documents(
-                query, documents, method='cosine_similarity')
+            ranked_docs = ranker.query_documents(
+                query, method='cosine_similarity')
         else:
             print("Invalid choice. Try again.")
             continue